@@ -1,10 +1,6 @@
-import sys
-import os
 import numpy as np
 
-path = os.path.join(os.path.dirname(__file__), '..', 'utils')
-sys.path.insert(1, path)
-from prediction import predict_
+from utils.prediction import predict_
 
 
 def simple_gradient(x, y, theta):
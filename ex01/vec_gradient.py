@@ -1,11 +1,5 @@
-import sys
-import os
 import numpy as np
 
-path = os.path.join(os.path.dirname(__file__), '..', 'utils')
-sys.path.insert(1, path)
-from prediction import predict_
-
 
 def gradient(x, y, theta):
     """Computes a gradient vector from three non-empty numpy.array,
@@ -1,11 +1,6 @@
-import sys
-import os
 import numpy as np
 
-## Collecting the path where gradient method is
-path = os.path.join(os.path.dirname(__file__), '..', 'ex01')
-sys.path.insert(1, path)
-from vec_gradient import gradient
+from ex01.vec_gradient import gradient
 
 
 def fit_(x, y, theta, alpha, max_iter):
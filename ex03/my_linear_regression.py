@@ -1,4 +1,6 @@
 from __future__ import annotations
+import json
+import time
 import numpy as np
 from math import sqrt
 
@@ -111,6 +113,8 @@ class MyLinearRegression(Metrics):
         self.alpha = float(alpha)
         self.max_iter = max_iter
         self.thetas = thetas
+        # Instrumentation of the last call of fit_ (see _reset_stats_):
+        self._reset_stats_()
 
     @staticmethod
     def _convert_thetas_(thetas):
@@ -118,6 +122,29 @@ class MyLinearRegression(Metrics):
             return thetas
         return np.array(thetas).reshape(-1, 1)
 
+    def _reset_stats_(self):
+        """ Private function resetting the instrumentation attributes
+        filled by fit_:
+            timings_: cumulated time (in seconds) spent in each phase
+                      of the training (validation, design_matrix,
+                      gradient, divergence_check, update).
+            n_iter_: number of iterations actually performed.
+            last_loss_: loss at the last callback (or at the end of the fit).
+            grad_norm_: norm of the last computed gradient.
+            diverged_: True if a NaN/inf appeared during the descent.
+            error_: the exception caught during fit_, None otherwise.
+        """
+        self.timings_ = {"validation": 0.0,
+                         "design_matrix": 0.0,
+                         "gradient": 0.0,
+                         "divergence_check": 0.0,
+                         "update": 0.0}
+        self.n_iter_ = 0
+        self.last_loss_ = None
+        self.grad_norm_ = None
+        self.diverged_ = False
+        self.error_ = None
+
     def _gradient_(self, x, y):
         """ Private function gradient, there is no test perform on the
         parameters. It is to avoid to perform useless same tests as each
@@ -160,7 +187,7 @@ class MyLinearRegression(Metrics):
         except:
             return None
 
-    def fit_(self, x, y):
+    def fit_(self, x, y, callback=None, every=100):
         """
         Description:
         Fits the model to the training dataset contained in x and y.
@@ -169,18 +196,31 @@ class MyLinearRegression(Metrics):
                (number of training examples, 1).
             y: has to be a numpy.array, a vector of shape m * 1:
                (number of training examples, 1).
-            theta: has to be a numpy.array, a vector of shape 2 * 1.
-            alpha: has to be a float, the learning rate
-            max_iter: has to be an int, the number of iterations done during
-                      the gradient descent
+            callback: callable or None, called every `every` iterations
+                      as callback(n_iter, loss, grad_norm). If it returns
+                      True, the gradient descent is stopped.
+            every: has to be an int, the period (in iterations) of the
+                   callback calls.
         Return:
             new_theta: numpy.array, a vector of shape 2 * 1.
             None if there is a matching shape problem.
             None if x, y, theta, alpha or max_iter is not of the expected type.
+            None if the gradient descent diverged (NaN or inf values).
         Raises:
             This function should not raise any Exception.
+        Note:
+            The time spent in each phase, the number of iterations, the
+            last loss and gradient norm, the divergence flag and the
+            exception caught (if any) are available after the call in
+            timings_, n_iter_, last_loss_, grad_norm_, diverged_ and error_.
         """
+        self._reset_stats_()
+        timings = self.timings_
+        # Thetas before the fit, restored if the descent diverges or fails
+        # (the updates below are not done in place).
+        thetas0 = self.thetas
         try:
+            tic = time.perf_counter()
             # Checking x, y and theta are numpy array
             if (not isinstance(x, np.ndarray)) \
                 or (not isinstance(y, np.ndarray)) \
@@ -192,12 +232,110 @@ class MyLinearRegression(Metrics):
                     or (x.shape[0] != y.shape[0]) \
                     or (self.thetas.shape[0] != x.shape[1] + 1):
                 return None
+            if (not isinstance(every, int)) or isinstance(every, bool) \
+                    or (every <= 0):
+                return None
+            timings["validation"] += time.perf_counter() - tic
+
+            # Building the design matrix once for all the iterations
+            tic = time.perf_counter()
+            xp = np.hstack((np.ones((x.shape[0], 1)), x))
+            xpt = xp.T / x.shape[0]
+            timings["design_matrix"] += time.perf_counter() - tic
+
             # Performing the gradient descent
-            for _ in range(self.max_iter):
-                grad = self._gradient_(x, y)
+            for ii in range(1, self.max_iter + 1):
+                tic = time.perf_counter()
+                grad = xpt @ (xp @ self.thetas - y)
+                toc = time.perf_counter()
+                timings["gradient"] += toc - tic
+                finite = np.all(np.isfinite(grad))
+                tic = time.perf_counter()
+                timings["divergence_check"] += tic - toc
+                if not finite:
+                    self.diverged_ = True
+                    self.n_iter_ = ii - 1
+                    self.thetas = thetas0
+                    return None
                 self.thetas = self.thetas - self.alpha * grad
-        except:
-            # If something unexpected happened, we juste leave
+                timings["update"] += time.perf_counter() - tic
+                self.n_iter_ = ii
+
+                if (callback is not None) and (ii % every == 0):
+                    # Half mean squared error of the updated thetas
+                    residual = xp @ self.thetas - y
+                    self.last_loss_ = float(np.mean(residual ** 2)) / 2.0
+                    self.grad_norm_ = float(np.linalg.norm(grad))
+                    if callback(ii, self.last_loss_, self.grad_norm_):
+                        break
+
+            residual = xp @ self.thetas - y
+            self.last_loss_ = float(np.mean(residual ** 2)) / 2.0
+            self.grad_norm_ = float(np.linalg.norm(grad))
+            if not np.all(np.isfinite(self.thetas)):
+                self.diverged_ = True
+                self.thetas = thetas0
+                return None
+            return self.thetas
+        except Exception as err:
+            # If something unexpected happened, we keep a trace, put the
+            # model back as it was and leave
+            self.error_ = err
+            self.thetas = thetas0
+            return None
+
+    def export_stats(self, path, fmt="prometheus"):
+        """
+        Description:
+        Writes the instrumentation of the last call of fit_ in a file.
+        Args:
+            path: has to be a str, the path of the output file.
+            fmt: has to be "prometheus" (text exposition format, the file
+                 is overwritten) or "json" (one JSON record appended per
+                 call, i.e. a structured log).
+        Returns:
+            True if the file has been written, None otherwise.
+        Raises:
+            This function should not raise any Exception.
+        """
+        def finite_or_none(val):
+            # NaN and inf are not valid JSON values
+            if (val is None) or (not np.isfinite(val)):
+                return None
+            return val
+
+        stats = {"n_iter": self.n_iter_,
+                 "loss": finite_or_none(self.last_loss_),
+                 "grad_norm": finite_or_none(self.grad_norm_),
+                 "diverged": self.diverged_,
+                 "error": None if self.error_ is None else repr(self.error_),
+                 "timings": dict(self.timings_)}
+        try:
+            if fmt == "json":
+                stats["time"] = time.time()
+                with open(path, "a") as fout:
+                    fout.write(json.dumps(stats, allow_nan=False) + "\n")
+                return True
+            if fmt != "prometheus":
+                return None
+            lines = ["# TYPE mylr_fit_iterations gauge",
+                     f"mylr_fit_iterations {self.n_iter_}",
+                     "# TYPE mylr_fit_diverged gauge",
+                     f"mylr_fit_diverged {int(self.diverged_)}",
+                     "# TYPE mylr_fit_failed gauge",
+                     f"mylr_fit_failed {int(self.error_ is not None)}"]
+            for name in ("loss", "grad_norm"):
+                if stats[name] is not None:
+                    lines += [f"# TYPE mylr_fit_{name} gauge",
+                              f"mylr_fit_{name} {stats[name]}"]
+            lines.append("# TYPE mylr_fit_phase_seconds gauge")
+            for phase, sec in self.timings_.items():
+                lines.append(f'mylr_fit_phase_seconds{{phase="{phase}"}} '
+                             + f"{sec}")
+            with open(path, "w") as fout:
+                fout.write("\n".join(lines) + "\n")
+            return True
+        except Exception:
             return None
 
     @staticmethod
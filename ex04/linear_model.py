@@ -1,26 +1,22 @@
-import numpy as np
-import pandas as pd
-from matplotlib.cm import get_cmap
-import matplotlib.pyplot as plt
-
 import os
 import sys
+import numpy as np
 
-path1 = os.path.join(os.path.dirname(__file__), '..', 'ex03')
-path2 = os.path.join(os.path.dirname(__file__), '..', 'utils')
-sys.path.insert(1, path1)
-sys.path.insert(1, path2)
+from ex03.my_linear_regression import MyLinearRegression as MyLR
+from utils.plot import plot
+from utils.prediction import predict_
 
-from my_linear_regression import MyLinearRegression as MyLR
-from plot import plot
-from prediction import predict_
+# pandas and matplotlib are heavy to import and only needed by the
+# questions reading the dataset or drawing, they are imported there.
+DATAFILE = os.path.join(os.path.dirname(__file__), "are_blue_pills_magics.csv")
 
 
-def first_question(datafile="are_blue_pills_magics.csv"):
+def first_question(datafile=DATAFILE):
     # ######################################################### #
     # ____________________  FIRST PART  _______________________ #
     # ######################################################### #
     # Read the CSV data file:
+    import pandas as pd
     try:
         data = pd.read_csv(datafile)
     except:
@@ -62,6 +58,8 @@ def second_question(x, y):
     # ___________________  SECOND PART  _______________________ #
     # ######################################################### #
     # Loss function vizualisation:
+    from matplotlib.cm import get_cmap
+    import matplotlib.pyplot as plt
     n = 6
     theta0 = np.linspace(80, 96, n)
     theta1 = np.linspace(-14, -4, 100)
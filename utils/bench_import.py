@@ -0,0 +1,72 @@
+import os
+import subprocess
+import sys
+import time
+
+# Modules used by a prediction-only worker, none of them should pull
+# pandas or matplotlib at import.
+CORE_MODULES = ["utils.prediction",
+                "ex01.vec_gradient",
+                "ex02.fit",
+                "ex03.my_linear_regression",
+                "ex04.linear_model",
+                "utils.plot"]
+HEAVY_MODULES = ["pandas", "matplotlib"]
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+
+
+def bench_import(module, repeat=5):
+    """Measures the import time of a module in fresh interpreters.
+    Args:
+        module: has to be a str, the dotted name of the module.
+        repeat: has to be an int, the number of fresh interpreters used.
+    Returns:
+        (best, heavy): the best wall time in seconds of a python process
+        importing the module (numpy excluded, it is imported first) and
+        the list of heavy modules loaded by the import.
+        None if the module can not be imported.
+    Raises:
+        This function should not raise any Exception.
+    """
+    code = ("import sys, time\n"
+            "import numpy\n"
+            "tic = time.perf_counter()\n"
+            f"import {module}\n"
+            "print(time.perf_counter() - tic)\n"
+            f"print(','.join(m for m in {HEAVY_MODULES!r} "
+            "if m in sys.modules))\n")
+    try:
+        best, heavy = None, []
+        for _ in range(repeat):
+            res = subprocess.run([sys.executable, "-c", code],
+                                 capture_output=True, text=True, check=True,
+                                 cwd=ROOT)
+            elapsed, loaded = res.stdout.splitlines()[-2:]
+            if (best is None) or (float(elapsed) < best):
+                best = float(elapsed)
+            heavy = [m for m in loaded.split(",") if m]
+        return best, heavy
+    except Exception:
+        return None
+
+
+if __name__ == "__main__":
+    # python -m utils.bench_import [max_ms]
+    max_ms = float(sys.argv[1]) if len(sys.argv) > 1 else 50.0
+    tic = time.perf_counter()
+    failed = False
+    for module in CORE_MODULES:
+        res = bench_import(module)
+        if res is None:
+            print(f"{module:30s} import failed")
+            failed = True
+            continue
+        best, heavy = res
+        status = "ok"
+        if heavy or (best * 1e3 > max_ms):
+            status = "TOO SLOW" + (f" (loads {', '.join(heavy)})"
+                                   if heavy else "")
+            failed = True
+        print(f"{module:30s} {best * 1e3:8.2f} ms  {status}")
+    print(f"total bench time: {time.perf_counter() - tic:.2f} s")
+    sys.exit(1 if failed else 0)
@@ -0,0 +1,320 @@
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+from statistics import NormalDist
+
+# Columns of the per-example quantities whose weighted sums are the
+# sufficient statistics of a replicate. xc is x centered on its mean and
+# e the residual of the least squares fit on the full sample.
+_ONE, _X, _E, _XX, _XE, _EE = range(6)
+METRICS = ("mse", "rmse", "r2score")
+
+SCHEMES = ("counts", "bayesian")
+
+# Below this number of drawn indexes (n_boot * m), the replicates are
+# computed in the current process: starting a pool would cost more.
+_POOL_MIN_DRAWS = 10000000
+
+# Data shared with the workers of the pool, sent once per worker.
+_WORKER_Z = None
+
+
+def _columns_(x, y):
+    """Stacks the per-example quantities (1, xc, e, xc^2, xc * e, e^2) and
+    returns them with the center (mean of x, mean of y, slope of the least
+    squares fit on the full sample).
+    Working on centered data and residuals keeps the weighted sums of a
+    replicate free of catastrophic cancellation when x or y are far from 0.
+    """
+    x = x.reshape(-1).astype('float64')
+    y = y.reshape(-1).astype('float64')
+    mx, my = np.mean(x), np.mean(y)
+    xc, yc = x - mx, y - my
+    slope = np.dot(xc, yc) / np.dot(xc, xc)
+    e = yc - slope * xc
+    z = np.column_stack((np.ones_like(xc), xc, e, xc * xc, xc * e, e * e))
+    return z, (mx, my, slope)
+
+
+def _solve_(s, center):
+    """Computes, from the weighted sums s (shape n * 6) of the replicates,
+    the least squares thetas of each replicate (shape n * 2) and the
+    metrics of this solution on its replicate.
+    """
+    mx, my, slope = center
+    sw, sx, se = s[:, _ONE], s[:, _X], s[:, _E]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        # Weighted means and (co)variances of xc and e on the replicate
+        xm, em = sx / sw, se / sw
+        cxx = s[:, _XX] - sx * xm
+        cxe = s[:, _XE] - sx * em
+        cee = s[:, _EE] - se * em
+        # The replicate slope is the full sample one plus the slope of the
+        # residuals, its sum of squared errors the one of that regression.
+        delta = cxe / cxx
+        t1 = slope + delta
+        t0 = my + slope * xm + em - t1 * (mx + xm)
+        sse = cee - delta * cxe
+        cyy = slope * slope * cxx + 2 * slope * cxe + cee
+        mse = sse / sw
+        metrics = {"mse": mse,
+                   "rmse": np.sqrt(mse),
+                   "r2score": 1 - sse / cyy}
+    return np.column_stack((t0, t1)), metrics
+
+
+def _is_positive_int_(val):
+    return isinstance(val, int) and (not isinstance(val, bool)) and (val > 0)
+
+
+def _check_(mylr, x, y, alpha, m_min):
+    return isinstance(x, np.ndarray) and isinstance(y, np.ndarray) \
+        and isinstance(mylr.thetas, np.ndarray) \
+        and (x.ndim == 2) and (x.shape[1] == 1) \
+        and (y.shape == x.shape) and (x.shape[0] >= m_min) \
+        and (mylr.thetas.shape == (2, 1)) \
+        and isinstance(alpha, float) and (0 < alpha < 1)
+
+
+def _model_report_(mylr, x, y, ols, ci_thetas):
+    """Compares the thetas of mylr (e.g. the result of fit_) with the
+    least squares solution: difference with ols, thetas inside their
+    confidence intervals or not, and metrics of mylr on the full sample.
+    """
+    thetas = mylr.thetas.astype('float64')
+    y = y.astype('float64')
+    r = y - (thetas[0, 0] + thetas[1, 0] * x.astype('float64'))
+    mse = float(np.mean(r ** 2))
+    return {"thetas": thetas,
+            "delta": thetas - ols,
+            "in_ci": (ci_thetas[:, 0] <= thetas[:, 0])
+            & (thetas[:, 0] <= ci_thetas[:, 1]),
+            "mse": mse,
+            "rmse": float(np.sqrt(mse)),
+            "r2score": 1 - float(np.sum(r ** 2)
+                                 / np.sum((y - np.mean(y)) ** 2))}
+
+
+def _init_worker_(z):
+    global _WORKER_Z
+    _WORKER_Z = z
+
+
+def _replicates_(z, n, seed, scheme):
+    """Draws n resamples of the rows of z as weight vectors and returns
+    their weighted sums. The weights are the counts of each row in a draw
+    with replacement ("counts") or exponential weights ("bayesian").
+    Both are written straight in a float64 matrix, as used by the product.
+    """
+    m = z.shape[0]
+    rng = np.random.default_rng(seed)
+    if scheme == "bayesian":
+        weights = rng.standard_exponential(size=(n, m))
+    else:
+        weights = np.empty((n, m))
+        for ii in range(n):
+            weights[ii] = np.bincount(rng.integers(0, m, size=m),
+                                      minlength=m)
+    return weights @ z
+
+
+def _worker_replicates_(n, seed, scheme):
+    return _replicates_(_WORKER_Z, n, seed, scheme)
+
+
+def bootstrap_(mylr, x, y, n_boot=1000, alpha=0.05, seed=None, n_jobs=None,
+               chunk=256, scheme="counts"):
+    """
+    Description:
+    Bootstrap of the thetas and of the metrics of the linear regression
+    of x and y, compared with the thetas of a MyLinearRegression instance.
+    Each resample is a weight vector over the examples, the data are never
+    copied: each replicate is solved in closed form (least squares) from
+    its weighted sums, and its metrics are the ones of its own solution.
+    The replicates are thus centered on the least squares solution of x
+    and y, which mylr.thetas only reaches if the gradient descent of fit_
+    has converged: the "model" entry of the result tells how far it is.
+    Replicates are spread over a pool of processes when there is enough
+    work.
+    Args:
+        mylr: a MyLinearRegression instance (thetas of shape 2 * 1).
+        x: has to be a numpy.array, a vector of shape m * 1.
+        y: has to be a numpy.array, a vector of shape m * 1.
+        n_boot: has to be an int, the number of replicates.
+        alpha: has to be a float, 1 - confidence level of the intervals.
+        seed: seed of the resampling. The result does not depend on n_jobs.
+        n_jobs: number of processes, None for all the cpus, 1 to stay in
+                the current process.
+        chunk: maximum number of replicates drawn at once by a process.
+        scheme: "counts" for the classical bootstrap (draws with
+                replacement), "bayesian" for the bayesian bootstrap
+                (exponential weights), about twice as fast for large m.
+    Returns:
+        A dict with the least squares thetas on the full sample ("ols",
+        shape 2 * 1), the replicates of the thetas ("thetas", shape
+        n_boot * 2) and of the metrics ("metrics", name -> array), the
+        percentile confidence intervals ("ci": thetas of shape 2 * 2 and
+        (low, high) per metric) and the report on mylr ("model": its
+        thetas, their difference with ols, whether they are inside their
+        intervals and its mse, rmse and r2score on x and y). mae is not a
+        function of the weighted sums and is not bootstrapped.
+        None if one of the parameters is not of the expected type, shape
+        or value.
+    Raises:
+        This function should not raise any Exception.
+    """
+    try:
+        if not _check_(mylr, x, y, alpha, 1):
+            return None
+        if (not _is_positive_int_(n_boot)) or (not _is_positive_int_(chunk)) \
+                or ((n_jobs is not None) and (not _is_positive_int_(n_jobs))) \
+                or (scheme not in SCHEMES):
+            return None
+        z, center = _columns_(x, y)
+        m = z.shape[0]
+        # Keeping the count matrix of a chunk around 64MB, the split only
+        # depends on m and n_boot so the draws are the same for any n_jobs.
+        chunk = max(1, min(chunk, 8000000 // m))
+        sizes = [min(chunk, n_boot - ii) for ii in range(0, n_boot, chunk)]
+        seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+        if (n_jobs == 1) or (len(sizes) == 1) \
+                or (n_boot * m < _POOL_MIN_DRAWS):
+            sums = [_replicates_(z, n, s, scheme)
+                    for n, s in zip(sizes, seeds)]
+        else:
+            with ProcessPoolExecutor(max_workers=n_jobs,
+                                     initializer=_init_worker_,
+                                     initargs=(z,)) as pool:
+                sums = list(pool.map(_worker_replicates_, sizes, seeds,
+                                     [scheme] * len(sizes)))
+        thetas, metrics = _solve_(np.vstack(sums), center)
+        ols, _ = _solve_(z.sum(axis=0, keepdims=True), center)
+
+        # Percentile intervals
+        q = (100 * alpha / 2, 100 * (1 - alpha / 2))
+        ci = {"thetas": np.nanpercentile(thetas, q, axis=0).T}
+        for name in METRICS:
+            low, high = np.nanpercentile(metrics[name], q)
+            ci[name] = (float(low), float(high))
+        ols = ols.reshape(-1, 1)
+        return {"ols": ols,
+                "thetas": thetas,
+                "metrics": metrics,
+                "ci": ci,
+                "model": _model_report_(mylr, x, y, ols, ci["thetas"])}
+    except Exception:
+        return None
+
+
+def jackknife_(mylr, x, y, alpha=0.05):
+    """
+    Description:
+    Jackknife (leave-one-out) of the thetas and of the metrics of the
+    linear regression of x and y, compared with the thetas of a
+    MyLinearRegression instance. Each replicate is obtained by removing
+    one example from the total weighted sums and is solved in closed
+    form, as in bootstrap_.
+    Args:
+        mylr: a MyLinearRegression instance (thetas of shape 2 * 1).
+        x: has to be a numpy.array, a vector of shape m * 1.
+        y: has to be a numpy.array, a vector of shape m * 1.
+        alpha: has to be a float, 1 - confidence level of the intervals.
+    Returns:
+        A dict with the least squares thetas on the full sample ("ols"),
+        the replicates of the thetas ("thetas", shape m * 2) and of the
+        metrics ("metrics", name -> array), the jackknife standard errors
+        ("se") and the normal confidence intervals around the full sample
+        values ("ci") and the report on mylr ("model"), with the same
+        layout as bootstrap_.
+        None if x, y or mylr are not of the expected type or shape.
+    Raises:
+        This function should not raise any Exception.
+    """
+    try:
+        if not _check_(mylr, x, y, alpha, 3):
+            return None
+        z, center = _columns_(x, y)
+        m = z.shape[0]
+        total = z.sum(axis=0)
+        full_thetas, full_metrics = _solve_(total[None, :], center)
+        thetas, metrics = _solve_(total - z, center)
+
+        def std_err(a):
+            return np.sqrt((m - 1) / m
+                           * np.nansum((a - np.nanmean(a, axis=0)) ** 2,
+                                       axis=0))
+
+        q = NormalDist().inv_cdf(1 - alpha / 2)
+        se = {"thetas": std_err(thetas)}
+        ci = {"thetas": np.stack((full_thetas[0] - q * se["thetas"],
+                                  full_thetas[0] + q * se["thetas"]),
+                                 axis=-1)}
+        for name in METRICS:
+            se[name] = float(std_err(metrics[name]))
+            center_val = float(full_metrics[name][0])
+            ci[name] = (center_val - q * se[name], center_val + q * se[name])
+
+        ols = full_thetas.reshape(-1, 1)
+        return {"ols": ols,
+                "thetas": thetas,
+                "metrics": metrics,
+                "se": se,
+                "ci": ci,
+                "model": _model_report_(mylr, x, y, ols, ci["thetas"])}
+    except Exception:
+        return None
+
+
+if __name__ == "__main__":
+    import time
+    from ex03.my_linear_regression import MyLinearRegression as MyLR
+
+    # Checking the replicates against the exact least squares solution and
+    # standard errors (np.linalg.lstsq) on data far from the origin. The
+    # reference is solved on centered x, the raw design matrix being rank
+    # deficient in float64 for x ~ 1e8.
+    rng = np.random.default_rng(42)
+    for m, offset in ((200, 1e6), (200, 1e8), (100000, 1e5)):
+        x = offset + rng.normal(0, 10, size=(m, 1))
+        y = 3 * x + 5 + rng.normal(0, 4, size=(m, 1))
+        xc = x - np.mean(x)
+        xp = np.hstack((np.ones((m, 1)), xc))
+        ols, sse = np.linalg.lstsq(xp, y, rcond=None)[:2]
+        ols[0] -= ols[1] * np.mean(x)
+        slope_se = np.sqrt(sse[0] / (m - 2) / np.sum(xc ** 2))
+
+        # A model whose slope stopped 5 standard errors short of the
+        # optimum (line still through the mean point), as a gradient
+        # descent with too few iterations could leave it.
+        shift = 5 * slope_se
+        mylr = MyLR(ols + np.array([[shift * np.mean(x)], [-shift]]))
+        boot = bootstrap_(mylr, x, y, n_boot=2000, seed=0)
+        bayes = bootstrap_(mylr, x, y, n_boot=2000, seed=0,
+                           scheme="bayesian")
+        jack = jackknife_(mylr, x, y)
+        print(f"m = {m}, x ~ {offset:.0e}")
+        print("  thetas (lstsq):     ", ols.ravel())
+        print("  thetas (bootstrap_):", boot["ols"].ravel())
+        print(f"  slope se: exact {slope_se:.5f}, "
+              + f"bootstrap {np.std(boot['thetas'][:, 1]):.5f}, "
+              + f"bayesian {np.std(bayes['thetas'][:, 1]):.5f}, "
+              + f"jackknife {jack['se']['thetas'][1]:.5f}")
+        print("  slope ci (bootstrap):", boot["ci"]["thetas"][1])
+        print("  r2score ci (bootstrap):", boot["ci"]["r2score"])
+        print("  model: delta", boot["model"]["delta"].ravel(),
+              "in ci", boot["model"]["in_ci"],
+              f"r2score {boot['model']['r2score']:.4f}")
+
+    # Timing, in the current process (n_jobs=1) to get the cost of one core
+    for m, n_boot in ((100000, 10000), (1000000, 200)):
+        x = rng.normal(0, 10, size=(m, 1))
+        y = 3 * x + 5 + rng.normal(0, 4, size=(m, 1))
+        mylr = MyLR(np.zeros((2, 1)))
+        for scheme in SCHEMES:
+            tic = time.perf_counter()
+            bootstrap_(mylr, x, y, n_boot=n_boot, seed=0, n_jobs=1,
+                       scheme=scheme)
+            elapsed = time.perf_counter() - tic
+            print(f"m = {m:7d}, {n_boot:5d} replicates ({scheme:8s}): "
+                  + f"{elapsed:6.2f} s, "
+                  + f"{elapsed / n_boot * 1e3:.2f} ms per replicate, "
+                  + f"10k replicates ~ {elapsed / n_boot * 1e4:.0f} s")
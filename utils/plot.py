@@ -1,16 +1,37 @@
 import numpy as np
-import matplotlib.pyplot as plt
-from prediction import predict_
+
+from utils.prediction import predict_
+
+
+def _subsample_(x, y, max_points, seed=None):
+    """Uniformly samples (without replacement) at most max_points rows of
+    x and y. Only the max_points drawn indexes are materialized.
+    """
+    if x.shape[0] <= max_points:
+        return x, y
+    rng = np.random.default_rng(seed)
+    idx = rng.choice(x.shape[0], size=max_points, replace=False)
+    idx.sort()
+    return x[idx], y[idx]
 
 
 def plot(x, y, theta, b_legend = True, 
          axes_labels = ["x (a.u.)", "y (a.u.)"],
-         data_labels = {"raw":"raw", "prediction":"prediction"}):
+         data_labels = {"raw":"raw", "prediction":"prediction"},
+         mode = "auto", max_points = 100000, savefile = None, seed = None):
     """Plot the data and prediction line from three non-empty numpy.array.
     Args:
         x: has to be an numpy.array, a vector of shape m * 1.
         y: has to be an numpy.array, a vector of shape m * 1.
         theta: has to be an numpy.array, a vector of shape 2 * 1.
+        mode: "scatter" (every point), "sample" (at most max_points
+              points drawn uniformly), "hexbin" (density of the points)
+              or "auto" (scatter if m <= max_points, sample otherwise).
+        max_points: has to be an int, the number of points drawn in
+                    "sample" mode.
+        savefile: None to show the figure, or the path of the file where
+                  the figure is saved without any GUI (batch rendering).
+        seed: seed of the sampling, for reproducible figures.
     Returns:
         Nothing.
     Raises:
@@ -19,18 +40,59 @@ def plot(x, y, theta, b_legend = True,
     if isinstance(x, np.ndarray) \
         and isinstance(y, np.ndarray) \
             and isinstance(theta, np.ndarray):
-        fig, axes = plt.subplots(1,1, figsize=(10,8))
-        axes.scatter(x, y, label = data_labels['raw'], c='#101214')
-        axes.plot(x, predict_(x, theta), label = data_labels['prediction'], c='#4287f5')
-        plt.legend()
-        plt.xlabel(axes_labels[0])
-        plt.ylabel(axes_labels[1])
+        if mode not in ("auto", "scatter", "sample", "hexbin"):
+            print("Unexpected plotting mode.")
+            return None
+        if (not isinstance(max_points, int)) or isinstance(max_points, bool) \
+                or (max_points <= 0):
+            print("max_points has to be a positive int.")
+            return None
+        if (x.size == 0) or (x.shape[0] != y.shape[0]):
+            return None
+        if mode == "auto":
+            mode = "scatter" if x.shape[0] <= max_points else "sample"
+
+        # The prediction is a straight line, its endpoints are enough.
+        x_line = np.array([[np.min(x)], [np.max(x)]])
+        y_line = predict_(x_line, theta)
+        if y_line is None:
+            print("Unexpected shape of theta.")
+            return None
+
+        # Matplotlib is only loaded when a plot is actually drawn. For batch
+        # rendering the figure is built without pyplot (no GUI backend).
+        if savefile is None:
+            import matplotlib.pyplot as plt
+            fig, axes = plt.subplots(1,1, figsize=(10,8))
+        else:
+            from matplotlib.figure import Figure
+            fig = Figure(figsize=(10,8))
+            axes = fig.add_subplot(1, 1, 1)
+
+        if mode == "hexbin":
+            hb = axes.hexbin(x.ravel(), y.ravel(), gridsize=100, bins='log',
+                             mincnt=1, cmap='Greys')
+            fig.colorbar(hb, ax=axes, label="count")
+        else:
+            if mode == "sample":
+                x, y = _subsample_(x, y, max_points, seed)
+            axes.scatter(x, y, label = data_labels['raw'], c='#101214',
+                         s = 4 if mode == "sample" else None)
+        axes.plot(x_line, y_line, label = data_labels['prediction'], c='#4287f5')
+        axes.set_xlabel(axes_labels[0])
+        axes.set_ylabel(axes_labels[1])
         if b_legend:
-            plt.legend()
-        plt.grid()
-        plt.show()
+            axes.legend()
+        axes.grid()
+        if savefile is None:
+            plt.show()
+        else:
+            fig.savefig(savefile)
 
 if __name__ == "__main__":
+    import os
+    import tempfile
+
     x = np.arange(1,6).reshape(-1, 1)
     y = np.array([[3.74013816],[3.61473236],[4.57655287],[4.66793434],[5.95585554]])
     
@@ -44,4 +106,11 @@ if __name__ == "__main__":
     
     # Example 3:
     theta3 = np.array([[3],[0.3]])
-    plot(x, y, theta3)
\ No newline at end of file
+    plot(x, y, theta3)
+
+    # Example 4: a larger dataset rendered headless in a temporary file
+    x = np.random.rand(200000, 1) * 5
+    y = 2 * x + np.random.randn(200000, 1)
+    savefile = os.path.join(tempfile.mkdtemp(), "large_hexbin.png")
+    plot(x, y, theta2, mode="hexbin", savefile=savefile)
+    print("Figure saved in", savefile)
\ No newline at end of file